@@ -20,19 +20,33 @@
 #  
 from __future__ import unicode_literals
 
+import codecs
+import os
 import serial
+import struct
 import time
 import datetime
+import threading
+from contextlib import contextmanager
 
 from .conf import *
 from .protocol import *
 from .utils import *
 
 # ASCII
-ENQ = chr(0x05) # Enquire. Прошу подтверждения.
-STX = chr(0x02) # Start of Text, начало текста. 
-ACK = chr(0x06) # Acknowledgement. Подтверждаю.
-NAK = chr(0x15) # Negative Acknowledgment, не подтверждаю.
+ENQ = b'\x05'   # Enquire. Прошу подтверждения.
+STX = b'\x02'   # Start of Text, начало текста. 
+ACK = b'\x06'   # Acknowledgement. Подтверждаю.
+NAK = b'\x15'   # Negative Acknowledgment, не подтверждаю.
+NUL = b'\x00'   # Null. Заполнитель текстовых полей.
+
+# Шесть однобайтовых полей ответа на команду FCH
+DEVICE_INFO = struct.Struct(b'6B')
+
+# Кодировщик и декодировщик текста для устройства, без поиска в
+# реестре кодеков при каждом вызове
+encode_text = codecs.getencoder(CODE_PAGE)
+decode_text = codecs.getdecoder(CODE_PAGE)
 
 
 class KktError(Exception):
@@ -58,6 +72,67 @@ class ConnectionError(KktError):
     pass
 
 
+# Пустое текстовое поле команд (40 байт)
+EMPTY_TEXT = NUL * 40
+
+# Допустимые значения налоговых групп
+TAX_VALUES = frozenset(range(5))
+
+# Упакованные наборы налогов. В кеш попадают только проверенные
+# наборы, которых не более 5**4, поэтому он ограничен сам собой.
+_TAXES_CACHE = {}
+
+# Закодированные тексты. Названия товаров в чеках повторяются, поэтому
+# кешируются, а при переполнении кеш просто очищается.
+TEXT_CACHE_SIZE = 1024
+_TEXT_CACHE = {}
+
+
+def _pack_money(value, message, *args):
+    """ Проверяет денежную величину (в МДЕ) и упаковывает в 5 байт.
+        Сообщение об ошибке форматируется аргументами args только
+        при выбросе исключения.
+    """
+    if value < 0 or value > 9999999999:
+        if args:
+            message = message % args
+        raise KktError(message)
+    return int5.pack(value)
+
+
+def _pack_taxes(taxes):
+    """ Проверяет и упаковывает набор из 4-х налогов """
+    if not isinstance(taxes, (list, tuple)):
+        raise KktError("Перечень налогов должен быть типом list или tuple")
+    key = tuple(taxes)
+    try:
+        value = _TAXES_CACHE.get(key)
+    except TypeError:
+        # Нехешируемые элементы заведомо не являются налоговыми группами
+        raise KktError("Налоги должны быть равны 0,1,2,3 или 4")
+    if value is None:
+        if len(key) != 4:
+            raise KktError("Количество налогов должно равняться 4")
+        if not TAX_VALUES.issuperset(key):
+            raise KktError("Налоги должны быть равны 0,1,2,3 или 4")
+        value = _TAXES_CACHE[key] = digits2string(key)
+    return value
+
+
+def _pack_text(text):
+    """ Проверяет текст, кодирует и дополняет нулями до 40 байт """
+    if not text:
+        return EMPTY_TEXT
+    value = _TEXT_CACHE.get(text)
+    if value is None:
+        if len(text) > 40:
+            raise KktError("Текст должнен быть менее или равен 40 символам")
+        if len(_TEXT_CACHE) >= TEXT_CACHE_SIZE:
+            _TEXT_CACHE.clear()
+        value = _TEXT_CACHE[text] = encode_text(text)[0].ljust(40, NUL)
+    return value
+
+
 class BaseKKT(object):
     """
     Базовый класс включает методы непосредственного общения с
@@ -129,6 +204,10 @@ class BaseKKT(object):
     stopbits       = serial.STOPBITS_ONE
     timeout        = 0.7
     writeTimeout   = 0.7
+    low_latency    = True
+    buffer_size    = None
+    _batch         = 0
+    _conn          = None
 
     def __init__(self, **kwargs):
         """ Пароли можно передавать в виде набора шестнадцатеричных
@@ -142,6 +221,17 @@ class BaseKKT(object):
 
         [ setattr(self, k, v) for k,v in kwargs.items() ]
 
+        # Последовательный порт не допускает одновременного обмена,
+        # поэтому один экземпляр может разделяться между потоками
+        # только через эту блокировку.
+        self._lock = threading.RLock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.disconnect()
+
     @property
     def is_connected(self):
         """ Возвращает состояние соединение """
@@ -170,15 +260,76 @@ class BaseKKT(object):
         except serial.SerialException:
             raise ConnectionError('Невозможно соединиться с ККМ (порт=%s)' % self.port)
 
+        if self.low_latency:
+            # pyserial >= 3.0 в GNU/Linux выставляет ASYNC_LOW_LATENCY
+            try:
+                self._conn.set_low_latency_mode(True)
+            except (AttributeError, NotImplementedError, IOError, OSError,
+                    ValueError):
+                pass
+            self.set_latency_timer()
+
+        # Размер буферов драйвера задаётся только в Windows
+        if hasattr(self._conn, 'set_buffer_size'):
+            size = self.buffer_size or max(4096, self.bod // 8)
+            try:
+                self._conn.set_buffer_size(rx_size=size, tx_size=size)
+            except (serial.SerialException, ValueError):
+                pass
+
         return self.check_port()
 
+    def set_latency_timer(self, value=1):
+        """ Уменьшает таймер задержки USB-COM адаптеров FTDI (в GNU/Linux
+            по умолчанию 16 мс), с которым приходит каждый ответ ККТ.
+            Для прочих портов ничего не делает и возвращает False.
+        """
+        try:
+            name = os.path.basename(os.path.realpath(self.port))
+            path = '/sys/bus/usb-serial/devices/%s/latency_timer' % name
+            with open(path, 'w') as f:
+                f.write('%d' % value)
+        except (IOError, OSError, TypeError, AttributeError):
+            return False
+        return True
+
     def disconnect(self):
         """ Закрывает соединение """
-        if self.conn:
-            self._conn.close()
-            self._conn = None
+        # Не закрываем порт посреди обмена, который ведёт другой поток
+        with self._lock:
+            if self._conn is not None:
+                # Дожидаемся отправки последнего подтверждения. Мёртвый
+                # порт (например, отключённый адаптер) всё равно закрываем.
+                try:
+                    self._conn.flush()
+                except (serial.SerialException, OSError, IOError):
+                    pass
+                try:
+                    self._conn.close()
+                finally:
+                    self._conn = None
         return True
 
+    @contextmanager
+    def batch(self):
+        """ Выполнение нескольких команд за одно соединение с ККТ.
+            Внутри блока порт не закрывается после каждой команды и
+            не занимается другими потоками, а закрывается на выходе:
+
+                with kkt.batch():
+                    kkt.x80(1, 10.0)
+                    kkt.x80(2, 5.5)
+                    kkt.x85(cash=21.0)
+        """
+        with self._lock:
+            self._batch += 1
+            try:
+                yield self
+            finally:
+                self._batch -= 1
+                if not self._batch:
+                    self.disconnect()
+
     def check_port(self):
         """ Проверка на готовность порта """
         if not self.conn.isOpen():
@@ -189,10 +340,8 @@ class BaseKKT(object):
         """ Проверка на ожидание команды """
         self.check_port()
         self._write(ENQ)
+        # Чтение само ждёт ответа в пределах self.timeout
         answer = self._read(1)
-        if not answer:
-            time.sleep(MIN_TIMEOUT)
-            answer = self._read(1)
         if answer in (NAK, ACK):
             return answer
         elif not answer:
@@ -280,27 +429,27 @@ class BaseKKT(object):
             raise ConnectionError('Нет связи с устройством')
         
         length  = ord(self._read(1))
-        command = self._read(1)
-        error   = self._read(1)
-        data    = self._read(length-2)
-        if length-2 != len(data):
+        # Команда, код ошибки, данные и контрольная сумма читаются разом
+        content = self._read(length+1)
+        if length+1 != len(content):
             self._write(NAK)
             self.disconnect()
-            msg = 'Длина ответа (%i) не равна длине полученных данных (%i)' % (length, len(data))
+            msg = 'Длина ответа (%i) не равна длине полученных данных (%i)' % (length+1, len(content))
             raise KktError(msg)
 
-        control_read = self._read(1)
-        control_summ = get_control_summ(chr(length) + command \
-                                        + error + data)
-        if control_read != control_summ:
+        command = content[0:1]
+        error   = content[1:2]
+        data    = content[2:length]
+        control_read = content[length:]
+        # Байт длины учитывается отдельно
+        control_summ = length ^ get_control_summ(content[:length])
+        if ord(control_read) != control_summ:
             self._write(NAK)
             self.disconnect()
-            msg = "Контрольная сумма %i должна быть равна %i " % (ord(control_summ), ord(control_read))
+            msg = "Контрольная сумма %i должна быть равна %i " % (control_summ, ord(control_read))
             raise KktError(msg)
 
         self._write(ACK)
-        self._flush()
-        #~ time.sleep(MIN_TIMEOUT*2)
         return {
             'command': command,
             'error':   ord(error),
@@ -309,28 +458,27 @@ class BaseKKT(object):
 
     def send(self, command, params, quick=False):
         """ Стандартная обработка команды """
+        # quick больше не используется и оставлен для совместимости API
 
         #~ self.clear()
 
-        if not quick:
-            self._flush()
-        data    = chr(command)
-        length  = 1
-        if not params is None:
-            data   += params
-            length += len(params)
-        content = chr(length) + data
+        if params is None:
+            params = b''
+        content = b''.join((int1.pack(len(params) + 1), int1.pack(command), params))
         control_summ = get_control_summ(content)
 
-        self._write(STX + content + control_summ)
-        self._flush()
+        self._write(b''.join((STX, content, int1.pack(control_summ))))
 
         return True
 
     def ask(self, command, params=None, sleep=0, pre_clear=True,\
-                without_password=False, disconnect=True, quick=False):
+                without_password=False, disconnect=False, quick=False):
         """ Высокоуровневый метод получения ответа. Состоит из
             последовательной цепочки действий. 
+
+            Порт остаётся открытым между командами и закрывается через
+            disconnect(), по выходу из блока `with kkt:` или при
+            disconnect=True.
             
             Возвращает позиционные параметры: (data, error, command)
         """
@@ -344,15 +492,16 @@ class BaseKKT(object):
 
         if params is None and not without_password:
             params = self.password
-        #~ if pre_clear:
-            #~ self.clear()
-        self.send(command, params, quick=quick)
-        if sleep:
-            time.sleep(sleep)
-        a = self.read()
-        answer, error, command = (a['data'], a['error'], a['command'])
-        if disconnect:
-            self.disconnect()
+        with self._lock:
+            #~ if pre_clear:
+                #~ self.clear()
+            self.send(command, params, quick=quick)
+            if sleep:
+                time.sleep(sleep)
+            a = self.read()
+            answer, error, command = (a['data'], a['error'], a['command'])
+            if disconnect and not self._batch:
+                self.disconnect()
         if error:
             raise KktError(error)
 
@@ -381,7 +530,7 @@ class KKT(BaseKKT):
                 Количество блоков данных (2 байта)
         """
         command = 0x01
-        params = self.admin_password + chr(code)
+        params = self.admin_password + int1.pack(code)
         data, error, command = self.ask(command, params)
         return data
 
@@ -405,7 +554,7 @@ class KKT(BaseKKT):
                 Блок данных (32 байта)
         """
         command = 0x02
-        params = self.admin_password + chr(code)
+        params = self.admin_password + int1.pack(code)
         data, error, command = self.ask(command, params)
         return data
 
@@ -627,9 +776,9 @@ class KKT(BaseKKT):
 
         if len(text) > 20:
             raise KktError('Длина строки должна быть меньше или равна 20 символов')
-        text = text.encode(CODE_PAGE).ljust(20, chr(0x0))
+        text = encode_text(text)[0].ljust(20, NUL)
 
-        params = self.password + chr(flags) + text
+        params = self.password + int1.pack(flags) + text
 
         data, error, command = self.ask(command, params, quick=True)
         operator = ord(data[0])
@@ -747,9 +896,9 @@ class KKT(BaseKKT):
 
         if len(text) > 40:
             raise KktError('Длина строки должна быть меньше или равна 40 символов')
-        text = text.encode(CODE_PAGE).ljust(40, chr(0x0))
+        text = _pack_text(text)
 
-        params = self.password + chr(flags) + text
+        params = self.password + int1.pack(flags) + text
 
         data, error, command = self.ask(command, params, quick=True)
         operator = ord(data[0])
@@ -775,9 +924,9 @@ class KKT(BaseKKT):
 
         if len(text) > 30:
             raise 'Длина строки должна быть меньше или равна 30 символов'
-        text = text.encode(CODE_PAGE).ljust(30, chr(0x0))
+        text = encode_text(text)[0].ljust(30, NUL)
 
-        params = self.password + text + chr(flags) 
+        params = self.password + text + int1.pack(flags) 
 
         data, error, command = self.ask(command, params)
         operator = ord(data[0])
@@ -806,12 +955,12 @@ class KKT(BaseKKT):
                 Содержимое регистра (6 байт)
         
         Пример запроса:
-            integer2money(int6.unpack(kkt.ask(0x1A, kkt.password + chr(121))[0][1:]))
+            integer2money(int6.unpack(kkt.ask(0x1A, kkt.password + int1.pack(121))[0][1:]))
         """
         
         command = 0x1A
 
-        params = self.password + chr(number) 
+        params = self.password + int1.pack(number) 
 
         data, error, command = self.ask(command, params)
 
@@ -830,7 +979,7 @@ class KKT(BaseKKT):
         """
         command = 0x1B
 
-        params = self.password + chr(number) 
+        params = self.password + int1.pack(number) 
 
         data, error, command = self.ask(command, params)
 
@@ -873,9 +1022,9 @@ class KKT(BaseKKT):
         """
         command = 0x1E
 
-        table = chr(table)
+        table = int1.pack(table)
         row   = int2.pack(row)
-        field = chr(field)
+        field = int1.pack(field)
 
         params = self.admin_password + table + row + field + value
 
@@ -916,9 +1065,9 @@ class KKT(BaseKKT):
                 Код ошибки (1 байт)
         """
         command = 0x21
-        hour    = chr(hour)
-        minute  = chr(minute)
-        second  = chr(second)
+        hour    = int1.pack(hour)
+        minute  = int1.pack(minute)
+        second  = int1.pack(second)
         params  = self.admin_password + hour + minute + second
         data, error, command = self.ask(command, params)
         return error
@@ -937,9 +1086,9 @@ class KKT(BaseKKT):
         if year >= 2000:
             year = year - 2000
 
-        year    = chr(year)
-        month   = chr(month)
-        day     = chr(day)
+        year    = int1.pack(year)
+        month   = int1.pack(month)
+        day     = int1.pack(day)
         params  = self.admin_password + day + month + year
         data, error, command = self.ask(command, params)
         return error
@@ -956,9 +1105,9 @@ class KKT(BaseKKT):
         command = 0x23
         if year >= 2000:
             year = year - 2000
-        year    = chr(year)
-        month   = chr(month)
-        day     = chr(day)
+        year    = int1.pack(year)
+        month   = int1.pack(month)
+        day     = int1.pack(day)
         params  = self.admin_password + day + month + year
         data, error, command = self.ask(command, params)
         return error
@@ -986,7 +1135,7 @@ class KKT(BaseKKT):
 
         cut = int(not bool(fullcut)) # 0 по умолчанию
 
-        params = self.password + chr(cut)
+        params = self.password + int1.pack(cut)
         data, error, command = self.ask(command, params)
         operator = ord(data[0])
         return operator
@@ -1050,7 +1199,7 @@ class KKT(BaseKKT):
         if row_count < 1 or row_count > 255:
             raise KktError("Количество строк должно быть в диапазоне между 1 и 255")
 
-        params  = self.password + chr(flags) + chr(row_count)
+        params  = self.password + int1.pack(flags) + int1.pack(row_count)
         data, error, command = self.ask(command, params)
         operator = ord(data[0])
         return operator
@@ -1319,7 +1468,7 @@ class KKT(BaseKKT):
                     FFh FFh FFh FFh FFh FFh
         """
         command = 0x62
-        params  = self.admin_password + chr(1 if after else 0)
+        params  = self.admin_password + int1.pack(1 if after else 0)
         data, error, command = self.ask(command, params)
 
         result = {
@@ -1792,36 +1941,23 @@ class KKT(BaseKKT):
         payment4 = money2integer(payment4)
         discount = money2integer(discount)
 
-        if cash < 0 or cash > 9999999999:
-            raise KktError("Наличные должны быть в диапазоне между 0 и 9999999999")
-        if payment2 < 0 or payment2 > 9999999999:
-            raise KktError("Оплата 2 должна быть в диапазоне между 0 и 9999999999")
-        if payment3 < 0 or payment3 > 9999999999:
-            raise KktError("Оплата 3 должна быть в диапазоне между 0 и 0..9999999999")
-        if payment4 < 0 or payment4 > 9999999999:
-            raise KktError("Оплата 4 должна быть в диапазоне между 0 и 9999999999")
+        cash     = _pack_money(cash,
+            "Наличные должны быть в диапазоне между 0 и 9999999999")
+        payment2 = _pack_money(payment2,
+            "Оплата 2 должна быть в диапазоне между 0 и 9999999999")
+        payment3 = _pack_money(payment3,
+            "Оплата 3 должна быть в диапазоне между 0 и 9999999999")
+        payment4 = _pack_money(payment4,
+            "Оплата 4 должна быть в диапазоне между 0 и 9999999999")
         if discount < -9999 or discount > 9999:
             raise KktError("Скидка должна быть в диапазоне между -9999 и 9999")
-        if len(text) > 40:
-            raise KktError("Текст должнен быть менее или равен 40 символам")
-        if len(taxes) != 4:
-            raise KktError("Количество налогов должно равняться 4")
-        if not isinstance(taxes, (list, tuple)):
-            raise KktError("Перечень налогов должен быть типом list или tuple")
-        for t in taxes:
-            if t not in range(0, 5):
-               raise KktError("Налоги должны быть равны 0,1,2,3 или 4")
-
-        cash       = int5.pack(cash)
-        payment2   = int5.pack(payment2)
-        payment3   = int5.pack(payment3)
-        payment4   = int5.pack(payment4)
+
         discount   = int2.pack(discount)
-        taxes      = digits2string(taxes)
-        text       = text.encode(CODE_PAGE).ljust(40, chr(0x0))
+        taxes      = _pack_taxes(taxes)
+        text       = _pack_text(text)
 
-        params  = self.password + cash + payment2 + payment3 + payment4\
-                                + discount + taxes + text
+        params  = b''.join((self.password, cash, payment2, payment3,
+                            payment4, discount, taxes, text))
         data, error, command = self.ask(command, params, quick=True)
         operator = ord(data[0])
         odd = int5.unpack(data[1:6])
@@ -1965,34 +2101,33 @@ class KKT(BaseKKT):
         count = count2integer(count)
         price = money2integer(price)
 
-        if count < 0 or count > 9999999999:
-            raise KktError("Количество должно быть в диапазоне между 0 и 9999999999")
-        if price < 0 or price > 9999999999:
-            raise KktError("Цена должна быть в диапазоне между 0 и 9999999999")
+        count = _pack_money(count,
+            "Количество должно быть в диапазоне между 0 и 9999999999")
+        price = _pack_money(price,
+            "Цена должна быть в диапазоне между 0 и 9999999999")
         if not department in range(17):
             raise KktError("Номер отдела должен быть в диапазоне между 0 и 16")
 
-        if len(text) > 40:
-            raise KktError("Текст должнен быть менее или равен 40 символам")
-        if len(taxes) != 4:
-            raise KktError("Количество налогов должно равняться 4")
-        if not isinstance(taxes, (list, tuple)):
-            raise KktError("Перечень налогов должен быть типом list или tuple")
-        for t in taxes:
-            if t not in range(0, 5):
-               raise KktError("Налоги должны быть равны 0,1,2,3 или 4")
-
-        count      = int5.pack(count)
-        price      = int5.pack(price)
-        department = chr(department)
-        taxes      = digits2string(taxes)
-        text       = text.encode(CODE_PAGE).ljust(40, chr(0x0))
-
-        params  = self.password + count + price + department + taxes + text
+        department = int1.pack(department)
+        taxes      = _pack_taxes(taxes)
+        text       = _pack_text(text)
+
+        params  = b''.join((self.password, count, price, department,
+                            taxes, text))
         data, error, command = self.ask(command, params, quick=True)
         operator = ord(data[0])
         return operator
 
+## Implemented multiple sales for x80
+    def x80_loop(self, items):
+        """ Продажа списка позиций за одно соединение с ККТ.
+            Каждая позиция - словарь с аргументами для x80.
+            Возвращает список результатов по каждой позиции.
+        """
+        x80 = self.x80
+        with self._lock:
+            return [ x80(**item) for item in items ]
+
 ## Implemented
     def x80(self, count, price, text='', department=0, taxes=[0,0,0,0]):
         """ Продажа
@@ -2121,38 +2256,21 @@ class KKT(BaseKKT):
         """
         command = 0x85
 
-        summa1 = money2integer(summs[0] or cash)
-        summa2 = money2integer(summs[1])
-        summa3 = money2integer(summs[2])
-        summa4 = money2integer(summs[3])
+        summs = [summs[0] or cash, summs[1], summs[2], summs[3]]
+        summs = [ money2integer(s) for s in summs ]
         discount = money2integer(discount)
         
-        for i,s in enumerate([summa1, summa2, summa3, summa4]):
-            if s < 0 or s > 9999999999:
-                raise KktError("Переменная `summa%d` должна быть в диапазоне между 0 и 9999999999" % i+1)
+        summs = [ _pack_money(s, "Переменная `summa%d` должна быть в "
+                    "диапазоне между 0 и 9999999999", i)
+                  for i,s in enumerate(summs, 1) ]
         if discount < -9999 or discount > 9999:
             raise KktError("Скидка должна быть в диапазоне между -9999 и 9999")
 
-        if len(text) > 40:
-            raise KktError("Текст должнен быть менее или равен 40 символам")
-        if len(taxes) != 4:
-            raise KktError("Количество налогов должно равняться 4")
-        if not isinstance(taxes, (list, tuple)):
-            raise KktError("Перечень налогов должен быть типом list или tuple")
-        for t in taxes:
-            if t not in range(0, 5):
-               raise KktError("Налоги должны быть равны 0,1,2,3 или 4")
-
-        summa1 = int5.pack(summa1)
-        summa2 = int5.pack(summa2)
-        summa3 = int5.pack(summa3)
-        summa4 = int5.pack(summa4)
         discount = int2.pack(discount)
-        taxes    = digits2string(taxes)
-        text     = text.encode(CODE_PAGE).ljust(40, chr(0x0))
+        taxes    = _pack_taxes(taxes)
+        text     = _pack_text(text)
 
-        params  = self.password + summa1 + summa2 + summa3 + summa4 \
-                                + discount + taxes + text
+        params  = b''.join([self.password] + summs + [discount, taxes, text])
         data, error, command = self.ask(command, params)
         operator = ord(data[0])
         odd = int5.unpack(data[1:6])
@@ -2181,23 +2299,12 @@ class KKT(BaseKKT):
 
         summa = money2integer(summa)
 
-        if summa < 0 or summa > 9999999999:
-            raise KktError("Сумма должна быть в диапазоне между 0 и 9999999999")
-        if len(text) > 40:
-            raise KktError("Текст должнен быть менее или равен 40 символам")
-        if len(taxes) != 4:
-            raise KktError("Количество налогов должно равняться 4")
-        if not isinstance(taxes, (list, tuple)):
-            raise KktError("Перечень налогов должен быть типом list или tuple")
-        for t in taxes:
-            if t not in range(0, 5):
-               raise KktError("Налоги должны быть равны 0,1,2,3 или 4")
-
-        summa      = int5.pack(summa)
-        taxes      = digits2string(taxes)
-        text       = text.encode(CODE_PAGE).ljust(40, chr(0x0))
+        summa      = _pack_money(summa,
+            "Сумма должна быть в диапазоне между 0 и 9999999999")
+        taxes      = _pack_taxes(taxes)
+        text       = _pack_text(text)
 
-        params  = self.password + summa + taxes + text
+        params  = b''.join((self.password, summa, taxes, text))
         data, error, command = self.ask(command, params, quick=True)
         operator = ord(data[0])
         return operator
@@ -2346,7 +2453,7 @@ class KKT(BaseKKT):
         if not document_type in range(4):
             raise KktError("Тип документа должен быть значением 0,1,2 или 3")
 
-        params  = self.password + chr(document_type)
+        params  = self.password + int1.pack(document_type)
         data, error, command = self.ask(command, params)
         operator = ord(data[0])
         return operator
@@ -2861,7 +2968,7 @@ class KKT(BaseKKT):
         command = 0xB1
         params  = self.admin_password
         data, error, command = self.ask(command, params)
-        version = data[:18].decode(CODE_PAGE)
+        version = decode_text(data[:18])[0]
         return version
 
 ## Implemented
@@ -2893,7 +3000,7 @@ class KKT(BaseKKT):
         command = 0xE1
         params  = self.admin_password
         data, error, command = self.ask(command, params)
-        return data.decode(CODE_PAGE)
+        return decode_text(data)[0]
 
     def xB4(self):
         """ Запрос контрольной ленты ЭКЛЗ
@@ -3002,7 +3109,7 @@ class KKT(BaseKKT):
         command = 0xBA
         params  = self.admin_password + int2.pack(int(number))
         data, error, command = self.ask(command, params)
-        kkm = data.decode(CODE_PAGE)
+        kkm = decode_text(data)[0]
         return kkm
 
     def xBB(self):
@@ -3453,14 +3560,16 @@ class KKT(BaseKKT):
         command = 0xFC
 
         data, error, command = self.ask(command, without_password=True)
+        (device_type, device_subtype, protocol_version, protocol_subversion,
+            device_model, device_language) = DEVICE_INFO.unpack_from(data)
         result = {
-            'device_type':         ord(data[0]),
-            'device_subtype':      ord(data[1]),
-            'protocol_version':    ord(data[2]),
-            'protocol_subversion': ord(data[3]),
-            'device_model':        ord(data[4]),
-            'device_language':     ord(data[5]),
-            'device_name': data[6:].decode(CODE_PAGE),
+            'device_type':         device_type,
+            'device_subtype':      device_subtype,
+            'protocol_version':    protocol_version,
+            'protocol_subversion': protocol_subversion,
+            'device_model':        device_model,
+            'device_language':     device_language,
+            'device_name': decode_text(data[DEVICE_INFO.size:])[0],
         }
         return result
 
@@ -20,11 +20,13 @@
 #  
 
 from __future__ import unicode_literals
+from functools import reduce
+import operator
 import struct
 import sys
 
 
-__all__ = ('PY2', 'int2', 'int4', 'int5', 'int6', 'int7', 'int8',
+__all__ = ('PY2', 'int1', 'int2', 'int4', 'int5', 'int6', 'int7', 'int8',
     'money2integer', 'integer2money', 'count2integer',
     'get_control_summ','string2bits', 'bits2string',
     'digits2string', 'password_prapare')
@@ -32,12 +34,32 @@ __all__ = ('PY2', 'int2', 'int4', 'int5', 'int6', 'int7', 'int8',
 
 PY2 = sys.version_info[0] == 2
 
+TEXT_TYPE = unicode if PY2 else str
+
+
+# Форматы целых чисел, значения которых дополняются или обрезаются.
+# Начиная с Python 3.7 атрибут Struct.format - текст, а не байты.
+INT_FORMATS = frozenset(['h', 'i', 'I', 'l', 'L', 'q', 'Q',
+    b'h', b'i', b'I', b'l', b'L', b'q', b'Q'])
+
+NULL_BYTE = b'\x00'
+
 
 class Struct(struct.Struct):
     """ Преобразователь """
+    __slots__ = ('length', 'pre_size', 'post_size')
+
     def __init__(self, *args, **kwargs):
         self.length = kwargs.pop('length', None)
         super(Struct, self).__init__(*args, **kwargs)
+        # Размеры выравнивания известны заранее, поэтому проверка
+        # формата выполняется только здесь, а не при каждом вызове.
+        if self.format in INT_FORMATS:
+            self.pre_size  = self.size
+            self.post_size = self.length
+        else:
+            self.pre_size  = None
+            self.post_size = None
 
     def unpack(self, value):
         value = self.pre_value(value)
@@ -49,27 +71,21 @@ class Struct(struct.Struct):
 
     def pre_value(self, value):
         """ Обрезает или добавляет нулевые байты """
-        if self.size:
-            if self.format in (b'h',b'i',b'I',b'l',b'L',b'q',b'Q'):
-                _len = len(value)
-                if _len < self.size:
-                    value = value.ljust(self.size, chr(0x0))
-                elif _len > self.size:
-                    value = value[:self.size]
+        size = self.pre_size
+        if size:
+            value = value.ljust(size, NULL_BYTE)[:size]
         return value
 
     def post_value(self, value):
         """ Обрезает или добавляет нулевые байты """
-        if self.length:
-            if self.format in (b'h',b'i',b'I',b'l',b'L',b'q',b'Q'):
-                _len = len(value)
-                if _len < self.length:
-                    value = value.ljust(self.length, chr(0x0))
-                elif _len > self.length:
-                    value = value[:self.length]
+        size = self.post_size
+        if size:
+            value = value.ljust(size, NULL_BYTE)[:size]
         return value
 
 # Объекты класса Struct
+# Формат unsigned char для однобайтовых полей
+int1 = Struct(b'B', length=1)
 # Формат short по длинне 2 байта
 int2 = Struct(b'h', length=2)
 # Формат int по длинне 3 байта
@@ -86,23 +102,34 @@ int7 = Struct(b'q', length=7)
 int8 = Struct(b'q', length=8)
 
 
+def _ordinals(string):
+    """ Коды символов строки (байтов или текста) """
+    if isinstance(string, (bytes, bytearray, memoryview)):
+        return bytearray(string)
+    if isinstance(string, TEXT_TYPE):
+        return map(ord, string)
+    # bytearray(int) создал бы нулевые байты вместо ошибки
+    msg = 'Ожидаются байты или текст'
+    if PY2:
+        msg = msg.encode('utf-8')
+    raise TypeError(msg)
+
+
 def string2bits(string):
     """ Convert string to bit array """
-    result = []
-    for char in string:
-        bits = bin(ord(char))[2:]
-        bits = '00000000'[len(bits):] + bits
-        result.extend([int(b) for b in bits])
-    return result
+    return [ (byte >> i) & 1 for byte in _ordinals(string)
+                             for i in (7, 6, 5, 4, 3, 2, 1, 0) ]
 
 
 def bits2string(bits):
     """ Convert bit array to string """
-    chars = []
-    for b in range(len(bits) / 8):
-        byte = bits[b*8:(b+1)*8]
-        chars.append(chr(int(''.join([str(bit) for bit in byte]), 2)))
-    return ''.join(chars).encode('utf-8')
+    chars = bytearray()
+    for b in range(len(bits) // 8):
+        byte = 0
+        for bit in bits[b*8:(b+1)*8]:
+            byte = (byte << 1) | int(bit)
+        chars.append(byte)
+    return bytes(chars)
 
 
 def money2integer(money, digits=2):
@@ -134,19 +161,16 @@ def count2integer(count, coefficient=1, digits=3):
 
 def get_control_summ(string):
     """
-    Подсчет CRC
+    Подсчет CRC. Возвращает целое число 0...255
     """
-    result = 0
-    for s in string:
-        result = result ^ ord(s)
-    return chr(result)
+    return reduce(operator.xor, _ordinals(string), 0)
 
 
 def digits2string(digits):
     """
     Преобразует список из целых или шестнадцатеричных значений в строку
     """
-    return ''.join([ chr(x) for x in digits ]).encode('utf-8')
+    return bytes(bytearray(digits))
 
 
 def password_prapare(password):
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import unittest
+
+from shtrihmfr.utils import (get_control_summ, string2bits, bits2string,
+    digits2string, int5)
+
+
+class OrdinalsTestCase(unittest.TestCase):
+
+    def test_control_summ(self):
+        self.assertEqual(get_control_summ(b'\x81\x02'), 0x83)
+        self.assertEqual(get_control_summ('\x81\x02'), 0x83)
+
+    def test_string2bits(self):
+        self.assertEqual(string2bits(b'\x81'), [1, 0, 0, 0, 0, 0, 0, 1])
+
+    def test_int_is_rejected(self):
+        # bytearray(3) - это три нулевых байта, а не ошибка
+        self.assertRaises(TypeError, string2bits, 3)
+        self.assertRaises(TypeError, get_control_summ, 7)
+
+
+class WireFormatTestCase(unittest.TestCase):
+
+    def test_int5(self):
+        for x in (0, 1, 1234, 9999999999):
+            self.assertEqual(len(int5.pack(x)), 5)
+            self.assertEqual(int5.unpack(int5.pack(x)), x)
+
+    def test_digits2string(self):
+        self.assertEqual(digits2string([0x80]), b'\x80')
+        self.assertEqual(digits2string([1, 0, 0x1e]), b'\x01\x00\x1e')
+
+    def test_bits_roundtrip(self):
+        value = b'\x00\x81\xff\x5a'
+        self.assertEqual(bits2string(string2bits(value)), value)
+
+
+if __name__ == '__main__':
+    unittest.main()